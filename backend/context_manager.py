@@ -1,11 +1,31 @@
-import json
+import atexit
+import mmap
 import os
+import queue
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 from dataclasses import dataclass, asdict
-from collections import deque
+from collections import deque, defaultdict
 
-@dataclass
+import jsonio
+
+# Input words that count towards the user's frequently used commands
+_COMMAND_KEYWORDS = frozenset({'create', 'write', 'read', 'execute', 'remind', 'list'})
+
+# Below this size a plain read is cheaper than setting up a memory map
+_MMAP_THRESHOLD = 64 * 1024
+
+
+def _atomic_write(path: str, payload: bytes):
+    """Write payload to a temp file and swap it in, so a crash never leaves a half-written file"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+@dataclass(slots=True)
 class ConversationTurn:
     """Represents a single conversation turn"""
     timestamp: str
@@ -13,8 +33,20 @@ class ConversationTurn:
     assistant_response: str
     session_id: str
     context_type: str = "general"  # general, task, reminder, etc.
+    ts_epoch: float = 0.0  # Same instant as timestamp, as a Unix epoch for cheap comparisons
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict of the fields; cheaper than asdict() since every field is a scalar"""
+        return {
+            'timestamp': self.timestamp,
+            'user_input': self.user_input,
+            'assistant_response': self.assistant_response,
+            'session_id': self.session_id,
+            'context_type': self.context_type,
+            'ts_epoch': self.ts_epoch
+        }
 
-@dataclass
+@dataclass(slots=True)
 class UserProfile:
     """User profile and preferences"""
     name: str = "Sir"
@@ -31,123 +63,234 @@ class UserProfile:
 class ContextManager:
     """Manages conversation context and memory"""
     
-    def __init__(self, context_file="context_memory.json", max_history=100):
-        self.context_file = context_file
+    def __init__(self, context_file="context_memory.json", turns_file="context_turns.jsonl", max_history=100,
+                 autosave_every=20):
+        self.context_file = context_file  # User profile (small, rewritten on save)
+        self.turns_file = turns_file  # Conversation turns (append-only, one JSON object per line)
         self.max_history = max_history
+        self.autosave_every = autosave_every  # Turns between profile autosaves
+        self._unsaved_turns = 0
+        self._dirty = False  # Profile changed since the last save
         self.current_session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         # In-memory storage for current session
         self.current_session = deque(maxlen=5)  # Keep last 5 turns in memory
-        self.history = []  # Store all conversations
+        self.history = deque(maxlen=max_history)  # Store all conversations, up to the history limit
+        self._evicted = 0  # Turns dropped off the front of history, i.e. the absolute index of history[0]
+        self._history_dicts = deque(maxlen=max_history)  # Serialized form of the newest turns in the log
+        self._log_lines = 0  # Turns currently in the log file, including ones already rotated out of memory
+        self._token_index: Dict[str, deque] = defaultdict(deque)  # Input word -> absolute indices into history
         self.user_profile = UserProfile()
+        self._profile_dict = None  # Cached asdict(self.user_profile), reset when the profile changes
+        
+        # Disk writes run on a background thread so the voice loop never waits on them
+        self._save_q = queue.Queue()
+        threading.Thread(target=self._writer_loop, daemon=True).start()
         
         # Load existing context
         self._load_context()
         
+        # Flush whatever is pending when the interpreter exits
+        atexit.register(self.flush)
+        
     def _load_context(self):
         """Load context from file"""
         try:
-            if os.path.exists(self.context_file):
-                with open(self.context_file, 'r') as f:
-                    data = json.load(f)
-                    
-                # Load user profile
-                if 'user_profile' in data:
-                    profile_data = data['user_profile']
-                    self.user_profile = UserProfile(**profile_data)
+            try:
+                with open(self.context_file, 'rb') as f:
+                    data = jsonio.loads(f.read())
+            except FileNotFoundError:
+                data = {}
                 
-                # Load recent conversations (last 24 hours)
-                recent_cutoff = (datetime.now() - timedelta(hours=24)).isoformat()
-                if 'conversations' in data:
-                    self.history = [ConversationTurn(**turn) for turn in data['conversations']]
-                    # Add recent conversations to current session context
-                    self.current_session.extend(self.history[-5:])
-                    
-        except Exception as e:
-            print(f"⚠️ Error loading context: {e}")
+            # Load user profile
+            if 'user_profile' in data:
+                profile_data = data['user_profile']
+                self.user_profile = UserProfile(**profile_data)
+                self._profile_dict = None
             
-    def _save_context(self):
-        """Save context to file"""
-        try:
-            # Load existing data
-            existing_data = {}
-            if os.path.exists(self.context_file):
-                with open(self.context_file, 'r') as f:
-                    existing_data = json.load(f)
-            
-            # Update with current data
-            existing_data['user_profile'] = asdict(self.user_profile)
+            # Older files kept the conversations next to the profile
+            legacy_turns = data.get('conversations', [])
             
-            # Merge conversations
-            if 'conversations' not in existing_data:
-                existing_data['conversations'] = []
+            try:
+                turns = self._read_turns()
+            except FileNotFoundError:
+                turns = legacy_turns
+                if legacy_turns:
+                    self._rewrite_turns(legacy_turns[-self.max_history:])
+            if legacy_turns:
+                self._dirty = True  # Rewrite the profile file without the old conversations
             
-            # Add current session turns
-            existing_data['conversations'] = [asdict(turn) for turn in self.history]
+            # Rotate the log once it grows past the history limit
+            if len(turns) > self.max_history:
+                turns = turns[-self.max_history:]
+                self._rewrite_turns(turns)
+            self._history_dicts.extend(turns)
+            self._log_lines = len(turns)
             
-            # Keep only recent conversations to manage file size
-            existing_data['conversations'] = existing_data['conversations'][-self.max_history:]
-            
-            # Save to file
-            with open(self.context_file, 'w') as f:
-                json.dump(existing_data, f, indent=2)
-                
+            # Load recent conversations (last 24 hours)
+            recent_cutoff = (datetime.now() - timedelta(hours=24)).timestamp()
+            for turn in turns:
+                if not turn.get('ts_epoch'):
+                    # Turns written before ts_epoch existed only carry the ISO timestamp
+                    turn['ts_epoch'] = datetime.fromisoformat(turn['timestamp']).timestamp()
+                if turn['ts_epoch'] >= recent_cutoff:
+                    self._add_to_history(ConversationTurn(**turn), turn['user_input'].casefold())
+            # Add recent conversations to current session context (the deque keeps the last 5)
+            self.current_session.extend(self.history)
+                    
         except Exception as e:
-            print(f"⚠️ Error saving context: {e}")
+            print(f"⚠️ Error loading context: {e}")
+    
+    def _add_to_history(self, turn: ConversationTurn, lower_input: str):
+        """Append a turn to history and the token index, dropping the oldest turn once full"""
+        index = self._evicted + len(self.history)
+        if len(self.history) == self.history.maxlen:
+            # The oldest turn holds the smallest index in each of its words' entries
+            for token in set(self.history[0].user_input.casefold().split()):
+                entries = self._token_index[token]
+                entries.popleft()
+                if not entries:
+                    del self._token_index[token]
+            self._evicted += 1
+        
+        for token in set(lower_input.split()):
+            self._token_index[token].append(index)
+        self.history.append(turn)
+    
+    def _read_turns(self) -> List[Dict[str, Any]]:
+        """Read every turn from the conversation log, memory-mapping large logs"""
+        with open(self.turns_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size <= _MMAP_THRESHOLD:
+                return [jsonio.loads(line) for line in f if line.strip()]
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return [jsonio.loads(line) for line in iter(mm.readline, b'') if line.strip()]
+    
+    def _rewrite_turns(self, turns: List[Dict[str, Any]]):
+        """Queue a replacement of the conversation log with the given turns"""
+        self._save_q.put(('turns', list(turns)))
+    
+    def _append_turn(self, turn: ConversationTurn):
+        """Queue a single conversation turn for the log, compacting it when it doubles the history limit"""
+        turn_dict = turn.to_dict()
+        self._history_dicts.append(turn_dict)
+        self._log_lines += 1
+        if self._log_lines > 2 * self.max_history:
+            self._rewrite_turns(self._history_dicts)
+            self._log_lines = len(self._history_dicts)
+        else:
+            self._save_q.put(('append', turn_dict))
+            
+    def _save_context(self):
+        """Queue a save of the user profile (turns are appended as they happen)"""
+        if not self._dirty:
+            return
+        if self._profile_dict is None:
+            self._profile_dict = asdict(self.user_profile)
+        self._save_q.put(('profile', {'user_profile': self._profile_dict}))
+        self._unsaved_turns = 0
+        self._dirty = False
+    
+    def _writer_loop(self):
+        """Background thread: write queued snapshots, coalescing whatever piled up meanwhile"""
+        while True:
+            jobs = [self._save_q.get()]
+            while True:
+                try:
+                    jobs.append(self._save_q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_jobs(jobs)
+            except Exception as e:
+                print(f"⚠️ Error saving context: {e}")
+            finally:
+                for _ in jobs:
+                    self._save_q.task_done()
+    
+    def _write_jobs(self, jobs):
+        """Write a batch of queued jobs: the last log rewrite, appends after it, and the latest profile"""
+        turns, appended, profile = None, [], None
+        for kind, payload in jobs:
+            if kind == 'turns':
+                turns, appended = payload, []  # The rewrite already holds earlier appends
+            elif kind == 'append':
+                appended.append(payload)
+            else:
+                profile = payload
+        
+        if turns is not None:
+            _atomic_write(self.turns_file, b''.join(jsonio.dumps(turn) + b'\n' for turn in turns))
+        if appended:
+            with open(self.turns_file, 'ab') as f:
+                f.write(b''.join(jsonio.dumps(turn) + b'\n' for turn in appended))
+        if profile is not None:
+            try:
+                _atomic_write(self.context_file, jsonio.dumps(profile, indent=True))
+            except Exception:
+                self._dirty = True  # Not on disk after all, so the next save retries it
+                raise
+    
+    def flush(self):
+        """Save the profile if needed and wait until every queued write is on disk"""
+        self._save_context()
+        self._save_q.join()
     
     def add_conversation_turn(self, user_input: str, assistant_response: str, context_type: str = "general"):
         """Add a conversation turn to memory"""
+        now = datetime.now()
         turn = ConversationTurn(
-            timestamp=datetime.now().isoformat(),
+            timestamp=now.isoformat(),
             user_input=user_input,
             assistant_response=assistant_response,
             session_id=self.current_session_id,
-            context_type=context_type
+            context_type=context_type,
+            ts_epoch=now.timestamp()
         )
         
         self.current_session.append(turn)
-        self.history.append(turn)
+        lower_input = user_input.casefold()
+        self._add_to_history(turn, lower_input)
+        self._append_turn(turn)
         
         # Update user profile
         self.user_profile.last_interaction = turn.timestamp
-        self._update_user_preferences(user_input)
+        self._update_user_preferences(lower_input)
+        self._profile_dict = None
+        self._dirty = True
         
-        # Auto-save every few turns
-        if len(self.current_session) % 5 == 0:
+        # Auto-save the profile every few turns
+        self._unsaved_turns += 1
+        if self._unsaved_turns >= self.autosave_every:
             self._save_context()
     
-    def _update_user_preferences(self, user_input: str):
-        """Update user preferences based on input"""
+    def _update_user_preferences(self, lower_input: str):
+        """Update user preferences based on the casefolded input"""
         # Track frequently used commands
-        command_keywords = ['create', 'write', 'read', 'execute', 'remind', 'list']
-        for keyword in command_keywords:
-            if keyword in user_input.lower():
-                if keyword not in self.user_profile.frequently_used_commands:
-                    self.user_profile.frequently_used_commands.append(keyword)
-                elif len(self.user_profile.frequently_used_commands) > 10:
-                    # Keep only top 10 most recent
-                    self.user_profile.frequently_used_commands = \
-                        self.user_profile.frequently_used_commands[-10:]
+        frequent = self.user_profile.frequently_used_commands
+        for word in lower_input.split():
+            if word in _COMMAND_KEYWORDS and word not in frequent:
+                frequent.append(word)
+        if len(frequent) > 10:
+            # Keep only top 10 most recent
+            self.user_profile.frequently_used_commands = frequent[-10:]
     
     def get_context_summary(self) -> str:
         """Get a summary of recent context for the agent"""
         if not self.current_session:
             return "No previous conversation context available."
         
-        # Get last few turns for context
-        recent_turns = list(self.current_session)[-5:]  # Last 5 turns
-        
-        context_summary = "## Recent Conversation Context:\n"
-        for turn in recent_turns:
+        # The session deque already holds only the last few turns
+        parts = ["## Recent Conversation Context:\n"]
+        for turn in self.current_session:
             # Truncate long responses for context
             response_preview = turn.assistant_response[:100] + "..." if len(turn.assistant_response) > 100 else turn.assistant_response
-            context_summary += f"User: {turn.user_input}\nAssistant: {response_preview}\n---\n"
+            parts.append(f"User: {turn.user_input}\nAssistant: {response_preview}\n---\n")
         
         # Add user preferences
         if self.user_profile.frequently_used_commands:
-            context_summary += f"\n## User frequently uses: {', '.join(self.user_profile.frequently_used_commands[-5:])}\n"
+            parts.append(f"\n## User frequently uses: {', '.join(self.user_profile.frequently_used_commands[-5:])}\n")
         
-        return context_summary
+        return "".join(parts)
     
     def get_relevant_context(self, current_input: str) -> str:
         """Get context relevant to the current input"""
@@ -155,33 +298,35 @@ class ContextManager:
             return ""
         
         relevant_turns = []
-        current_lower = current_input.lower()
+        current_lower = current_input.casefold()
         
-        # Look for related previous conversations
-        for turn in reversed(self.history):
-            if any(word in turn.user_input.lower() for word in current_lower.split()):
-                relevant_turns.append(turn)
-                if len(relevant_turns) >= 3:  # Limit to 3 most relevant
-                    break
+        # Look for previous conversations sharing a word with the current input
+        candidates = set().union(*(self._token_index.get(word, ()) for word in current_lower.split()))
+        for index in sorted(candidates, reverse=True):
+            relevant_turns.append(self.history[index - self._evicted])
+            if len(relevant_turns) >= 3:  # Limit to 3 most relevant
+                break
         
         if not relevant_turns:
             return ""
         
-        context = "## Relevant Previous Context:\n"
+        parts = ["## Relevant Previous Context:\n"]
         for turn in reversed(relevant_turns):  # Most recent first
-            context += f"Previously - User: {turn.user_input}\nAssistant: {turn.assistant_response[:150]}...\n---\n"
+            parts.append(f"Previously - User: {turn.user_input}\nAssistant: {turn.assistant_response[:150]}...\n---\n")
         
-        return context
+        return "".join(parts)
     
     def save_session(self):
         """Manually save the current session"""
-        self._save_context()
+        self.flush()
         print("✅ Context saved successfully")
     
     def clear_session(self):
         """Clear current session but keep user profile"""
         self.current_session.clear()
         self.history.clear()
+        self._evicted = 0
+        self._token_index.clear()
         self.current_session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         print("✅ Current session cleared")
     
@@ -196,14 +341,20 @@ class ContextManager:
         }
     
     def clean_context_file(self):
-        """Cleans the context file by writing an empty JSON object."""
+        """Cleans the context files by writing an empty JSON object and an empty turn log."""
         try:
-            with open(self.context_file, 'w') as f:
-                json.dump({}, f)
+            self._save_q.join()  # Let pending writes land before truncating
+            with open(self.context_file, 'wb') as f:
+                f.write(jsonio.dumps({}))
+            open(self.turns_file, 'wb').close()
+            self._history_dicts.clear()
+            self._log_lines = 0
             print("✅ Context memory file cleaned.")
             # Reset in-memory state
             self.current_session.clear()
             self.user_profile = UserProfile()
+            self._profile_dict = None
+            self._dirty = False
             self.current_session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         except Exception as e:
             print(f"⚠️ Error cleaning context file: {e}")
\ No newline at end of file
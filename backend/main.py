@@ -1,16 +1,33 @@
 import sys
 sys.path.append('/home/kathir/Documents/ProjectEND/')
+import logging
+import os
+import re
 import threading
 from PyQt5.QtWidgets import QApplication
 from yi import SiriVoiceWidget
 
+# Configure logging before model is imported, since it connects to the remote tools at import time
+logging.basicConfig(
+    level=os.getenv("JARVIS_LOG", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(message)s"
+)
+
 from model import (
-    process_voice_command, classify_and_summarize_response, context_manager,
-    get_tool_status, refresh_remote_tools
+    process_voice_command, stream_spoken_response, context_manager,
+    get_tool_status, refresh_remote_tools, close_remote_tools
 )
-from voicetalk.speech_to_text import listen_for_wakeword, record_and_transcribe
+from voicetalk.speech_to_text import listen_for_wakeword, record_and_transcribe, close_input_stream
 from voicetalk.text_to_speech import speak
-from tools.localtools import start_reminder_scheduler, reminder_scheduler_running
+from tools.localtools import start_reminder_scheduler, stop_reminder_scheduler
+
+# Command phrases, built once instead of on every utterance
+_WORD_RE = re.compile(r"[a-z']+")
+_DISMISS_WORDS = frozenset({'thanks', 'thank', 'goodbye', 'bye', 'dismiss', 'sleep'})
+_DISMISS_PHRASES = ("that's all",)
+_EXIT_WORDS = frozenset({'exit', 'quit', 'shutdown'})
+_STATUS_PHRASES = ('tool status', 'check tools', 'list tools')
+_REFRESH_PHRASES = ('refresh tools', 'reconnect tools', 'retry remote')
 
 def display_startup_info():
     """Display enhanced startup information including remote tools status"""
@@ -50,12 +67,11 @@ def display_startup_info():
     print("\nSay 'Hey JARVIS' to wake me up!")
     print("=" * 80)
 
-def handle_system_commands(command: str) -> bool:
-    """Handle special system commands that don't require agent processing"""
-    command_lower = command.lower()
+def handle_system_commands(command_lower: str) -> bool:
+    """Handle special system commands that don't require agent processing (expects the lowercased command)"""
     
     # Tool status command
-    if any(phrase in command_lower for phrase in ['tool status', 'check tools', 'list tools']):
+    if any(phrase in command_lower for phrase in _STATUS_PHRASES):
         tool_status = get_tool_status()
         response = f"""🛠️ Tool Status Report:
         
@@ -73,7 +89,7 @@ Status: {'All systems operational' if tool_status['remote_server_status'] == 'co
         return True
     
     # Refresh remote tools command
-    elif any(phrase in command_lower for phrase in ['refresh tools', 'reconnect tools', 'retry remote']):
+    elif any(phrase in command_lower for phrase in _REFRESH_PHRASES):
         print("🔄 Refreshing remote tools connection...")
         speak("Refreshing remote tools connection...")
         
@@ -134,9 +150,11 @@ def main_voice_loop():
                     continue
                 
                 print(f"💬 You said: {command}")
+                command_lower = command.lower()
+                words = set(_WORD_RE.findall(command_lower))
                 
                 # Check for dismiss/goodbye commands
-                if any(word in command.lower() for word in ['that\'s all', 'thank you', 'thanks', 'goodbye', 'bye', 'dismiss', 'go to sleep', 'sleep mode']):
+                if words & _DISMISS_WORDS or any(phrase in command_lower for phrase in _DISMISS_PHRASES):
                     # Save context before dismissing
                     context_manager.save_session()
                     if ui_widget:
@@ -146,7 +164,7 @@ def main_voice_loop():
                     break
                 
                 # Check for complete exit
-                if any(word in command.lower() for word in ['exit', 'quit', 'shutdown']):
+                if words & _EXIT_WORDS:
                     context_manager.save_session()
                     if ui_widget:
                         ui_widget.close()
@@ -154,7 +172,7 @@ def main_voice_loop():
                     return
                 
                 # Handle system commands
-                if handle_system_commands(command):
+                if handle_system_commands(command_lower):
                     continue
                 
                 # Process the command with context and tools
@@ -172,11 +190,11 @@ def main_voice_loop():
                 response = process_voice_command(command)
                 print(f"🤖 JARVIS: {response}")
                 
-                # Classify and speak the response
+                # Speak the response (or its summary) sentence by sentence as it is produced
                 if ui_widget:
                     ui_widget.state_changed.emit('speaking')
-                spoken_response_data = classify_and_summarize_response(response)
-                speak(spoken_response_data["spoken_response"])
+                for sentence in stream_spoken_response(response):
+                    speak(sentence)
                 
                 # Wait a moment before next input
                 print("👂 Ready for your next request...")
@@ -268,13 +286,14 @@ if __name__ == "__main__":
         
     except KeyboardInterrupt:
         print("\n👋 JARVIS shutting down...")
-        context_manager.save_session()
     except Exception as e:
         print(f"❌ Fatal error: {e}")
-        context_manager.save_session()
     finally:
+        context_manager.save_session()
+        close_input_stream()
         if ui_widget:
             ui_widget.close()
-        reminder_scheduler_running = False
+        stop_reminder_scheduler()
+        close_remote_tools()
         print("✅ JARVIS shutdown complete. Context saved.")
         print("Thank you for using JARVIS! 🤖")
\ No newline at end of file
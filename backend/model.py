@@ -1,17 +1,22 @@
 # model.py (updated section with proper RemoteTools integration)
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.prebuilt import create_react_agent
-from langchain_core.tools import tool
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tools import tool, StructuredTool
 from langchain_core.messages import SystemMessage
-import google.generativeai as genai
-import os
+import asyncio
+import contextvars
+import functools
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from tools.localtools import (
     create_folder, create_file, write_file, read_file, execute_command, list_directory,
     create_reminder, list_reminders,
     get_current_time
 )
-from tools.remotetools import RemoteToolsManager  # Import our new RemoteToolsManager
+from tools.remotetools import RemoteToolsManager, create_session  # Import our new RemoteToolsManager
 from context_manager import ContextManager
 
 # Load environment variables
@@ -20,8 +25,34 @@ load_dotenv()
 # Initialize Context Manager
 context_manager = ContextManager()
 
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0)
+# LLM, created on first use so the Gemini SDK is only imported when needed
+_llm = None
+
+def _get_llm():
+    """Return the shared chat model, creating it on first use"""
+    global _llm
+    if _llm is None:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        _llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0)
+    return _llm
+
+# Split point between sentences of streamed text
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Markdown markers and emoji that should not reach the speech synthesizer.
+# Emphasis markers inside a word (my_file.py, 2*3) are kept; '#' is only stripped as a heading.
+_MARKDOWN_RE = re.compile(r'^\s*(?:[-*•#>]+|\d+[.)])\s+|(?<!\w)[*_]+|[*_]+(?!\w)|`+', re.MULTILINE)
+_EMOJI_RE = re.compile('[\U0001F000-\U0001FAFF\u2600-\u27BF\uFE0F]')
+
+# Responses longer than this may get an LLM-written voice summary instead of an extractive one
+_LLM_SUMMARY_MIN_CHARS = 1500
+
+# The agent's ToolNode runs the tool calls of one LLM turn concurrently on a
+# thread pool; this bounds how many run at once
+AGENT_CONFIG = {"max_concurrency": 5}
+
+# Commands of one batch processed at once; kept separate so AGENT_CONFIG still bounds each command's tools
+BATCH_CONCURRENCY = 8
 
 # Add context-aware tools
 @tool
@@ -55,95 +86,155 @@ local_tools = [
     get_current_time, save_context, clear_context, get_context_stats
 ]
 
+# Tool description lines for the system prompts, built once instead of per command
+_local_desc_cache = "\n".join(f"- {tool_obj.name}: {tool_obj.description}" for tool_obj in local_tools)
+_remote_desc_cache = ""  # Rebuilt whenever remote tools are (re)discovered
+_tools_version = 0  # Bumped whenever the tool set may have changed
+
+logger = logging.getLogger("jarvis")
+
 # Initialize and load remote tools
 remote_tools_manager = None
 remote_tools = []
+_http_session = None  # Shared across refreshes so keep-alive connections survive a re-discovery
+
+# Last remote health check result, reused for _HEALTH_TTL seconds
+_HEALTH_TTL = 15.0
+_health_cache = {"status": False, "ts": float("-inf")}
+
+def _cached_health() -> bool:
+    """Return the remote server health, re-checking at most once per _HEALTH_TTL seconds"""
+    if remote_tools_manager is None:
+        return False
+    if time.monotonic() - _health_cache["ts"] > _HEALTH_TTL:
+        _health_cache.update(status=remote_tools_manager.health_check(), ts=time.monotonic())
+    return _health_cache["status"]
 
 def initialize_remote_tools(base_url: str = "http://localhost:8000"):
     """Initialize remote tools manager and discover tools"""
-    global remote_tools_manager, remote_tools
+    global remote_tools_manager, remote_tools, _remote_desc_cache, _http_session, _tools_version
     
+    _remote_desc_cache = ""
+    _tools_version += 1
     try:
-        print("🔄 Initializing remote tools...")
-        remote_tools_manager = RemoteToolsManager(base_url)
+        logger.info("🔄 Initializing remote tools...")
+        if _http_session is None:
+            _http_session = create_session()
+        remote_tools_manager = RemoteToolsManager(base_url, session=_http_session)
         
         # Check if server is accessible
-        if remote_tools_manager.health_check():
-            print("✅ Remote tools server is accessible")
+        healthy = remote_tools_manager.health_check()
+        _health_cache.update(status=healthy, ts=time.monotonic())
+        if healthy:
+            logger.info("✅ Remote tools server is accessible")
             
             # Discover and register tools
             if remote_tools_manager.discover_tools():
                 remote_tools = remote_tools_manager.get_tools()
-                print(f"✅ Loaded {len(remote_tools)} remote tools")
+                logger.info("✅ Loaded %d remote tools", len(remote_tools))
                 
                 # List available remote tools
                 available_tools = remote_tools_manager.list_available_tools()
-                if available_tools:
-                    print("📋 Available remote tools:")
-                    for name, desc in available_tools.items():
-                        print(f"  • {name}: {desc}")
+                _remote_desc_cache = "\n".join(f"- {name}: {desc}" for name, desc in available_tools.items())
+                if available_tools and logger.isEnabledFor(logging.INFO):
+                    logger.info("📋 Available remote tools:\n%s",
+                                "\n".join(f"  • {name}: {desc}" for name, desc in available_tools.items()))
                 
                 return True
             else:
-                print("❌ Failed to discover remote tools")
+                logger.error("❌ Failed to discover remote tools")
                 return False
         else:
-            print("❌ Remote tools server is not accessible")
+            logger.error("❌ Remote tools server is not accessible")
             return False
             
     except Exception as e:
-        print(f"❌ Error initializing remote tools: {e}")
+        logger.error("❌ Error initializing remote tools: %s", e)
         return False
 
 # Initialize remote tools at startup
 initialize_remote_tools()
 
-# Combine all tools
-all_tools = local_tools + remote_tools
-
 # Add tool to list available tools
 @tool
 def list_available_tools() -> str:
     """List all available local and remote tools with their descriptions."""
-    result = "🛠️ Available Tools:\n\n"
+    parts = ["🛠️ Available Tools:\n"]
     
     # Local tools
-    result += "📍 LOCAL TOOLS:\n"
-    for tool_obj in local_tools:
-        result += f"  • {tool_obj.name}: {tool_obj.description}\n"
+    parts.append("📍 LOCAL TOOLS:")
+    parts.extend(f"  • {tool_obj.name}: {tool_obj.description}" for tool_obj in local_tools)
     
     # Remote tools
     if remote_tools_manager and remote_tools:
-        result += "\n🌐 REMOTE TOOLS:\n"
+        parts.append("\n🌐 REMOTE TOOLS:")
         available_remote = remote_tools_manager.list_available_tools()
-        for name, desc in available_remote.items():
-            result += f"  • {name}: {desc}\n"
+        parts.extend(f"  • {name}: {desc}" for name, desc in available_remote.items())
     else:
-        result += "\n🌐 REMOTE TOOLS: None available (server not accessible)\n"
+        parts.append("\n🌐 REMOTE TOOLS: None available (server not accessible)")
     
-    result += f"\n📊 Total tools: {len(all_tools)}"
-    return result
+    parts.append(f"\n📊 Total tools: {len(all_tools)}")
+    return "\n".join(parts)
 
-# Add the tool listing to available tools
-all_tools.append(list_available_tools)
+# Combine all tools; a tuple so a refresh swaps in a new sequence instead of mutating a shared one
+all_tools = (*local_tools, *remote_tools, list_available_tools)
 
-def create_context_aware_agent():
-    """Create an agent with context awareness and both local and remote tools"""
+# Read-only, argument-free tools that are run ahead of time while the LLM is still generating
+SPECULATABLE = frozenset({"get_current_time", "list_reminders", "get_context_stats", "list_available_tools"})
+_speculation_pool = ThreadPoolExecutor(max_workers=len(SPECULATABLE))
+
+class _Speculation(BaseCallbackHandler):
+    """Prefetched results for one agent invocation, dropped as soon as any other tool runs"""
     
-    # Build comprehensive tool descriptions
-    tool_descriptions = []
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {
+            tool_obj.name: _speculation_pool.submit(tool_obj.invoke, {})
+            for tool_obj in all_tools if tool_obj.name in SPECULATABLE
+        }
     
-    # Add local tools
-    for tool_obj in local_tools:
-        tool_descriptions.append(f"- {tool_obj.name}: {tool_obj.description}")
+    def take(self, name):
+        """Remove and return the pending result for a tool, if there still is one"""
+        with self._lock:
+            return self._futures.pop(name, None)
     
-    # Add remote tools
-    if remote_tools_manager and remote_tools:
-        available_remote = remote_tools_manager.list_available_tools()
-        for name, desc in available_remote.items():
-            tool_descriptions.append(f"- {name}: {desc}")
+    def cancel(self):
+        """Drop every prefetched result that has not been used"""
+        with self._lock:
+            futures, self._futures = self._futures, {}
+        for future in futures.values():
+            future.cancel()
     
-    tool_descriptions_text = "\n".join(tool_descriptions)
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        # Any other tool (create_reminder, clear_context, ...) may change what the prefetched reads return
+        if (serialized or {}).get("name") not in SPECULATABLE:
+            self.cancel()
+
+# Speculation for the invocation running in the current context; None outside process_voice_command
+_current_speculation = contextvars.ContextVar("_current_speculation", default=None)
+
+def _speculative(tool_obj):
+    """Wrap a speculatable tool so it returns the prefetched result when one is pending"""
+    def run_tool() -> str:
+        speculation = _current_speculation.get()
+        future = speculation.take(tool_obj.name) if speculation is not None else None
+        if future is not None:
+            return future.result()
+        return tool_obj.invoke({})
+    
+    return StructuredTool.from_function(func=run_tool, name=tool_obj.name, description=tool_obj.description)
+
+def _get_tool_descriptions_text():
+    """Return the cached local and remote tool description lines"""
+    if _remote_desc_cache:
+        return _local_desc_cache + "\n" + _remote_desc_cache
+    return _local_desc_cache
+
+def create_context_aware_agent():
+    """Create an agent with context awareness and both local and remote tools"""
+    from langgraph.prebuilt import create_react_agent, ToolNode
+    
+    tool_descriptions_text = _get_tool_descriptions_text()
     
     system_message = f"""You are JARVIS, an intelligent AI assistant with persistent memory, context awareness, and access to both local and remote tools.
 
@@ -181,57 +272,37 @@ Personality:
 
 Always provide helpful, accurate, and contextually relevant responses while efficiently using available tools to accomplish tasks."""
     
-    return create_react_agent(llm, all_tools, prompt=system_message)
-
-# Create the agent
-agent = create_context_aware_agent()
-
-def configure_genai():
-    """Configures the Generative AI model with the API key."""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY not found in environment variables.")
-    genai.configure(api_key=api_key)
-
-def get_gemini_model(model_name="gemini-1.5-flash"):
-    """Returns a Gemini generative model."""
-    configure_genai()
-    return genai.GenerativeModel(model_name)
+    tools = [_speculative(tool_obj) if tool_obj.name in SPECULATABLE else tool_obj for tool_obj in all_tools]
+    return create_react_agent(_get_llm(), ToolNode(tools), prompt=system_message)
+
+# The agent is built on first use (and rebuilt when remote tools are refreshed)
+agent = None
+_tools_fingerprint = None  # Remote tool set the current agent was built with
+
+def _remote_tools_fingerprint():
+    """Identify the discovered remote tool set, so a refresh that finds the same tools can keep the agent"""
+    if remote_tools_manager is None or not remote_tools:
+        return ()
+    return tuple(sorted(
+        (name, config['description'], config['endpoint'], config['method'])
+        for name, config in remote_tools_manager.tool_configs.items()
+    ))
+
+def _get_agent():
+    """Return the agent, creating it on first use"""
+    global agent, _tools_fingerprint
+    if agent is None:
+        agent = create_context_aware_agent()
+        _tools_fingerprint = _remote_tools_fingerprint()
+    return agent
 
 def generate_text(prompt: str) -> str:
-    """Generates text using the Gemini 1.5 Flash model."""
-    model = get_gemini_model()
+    """Generates text using the shared Gemini 1.5 Flash chat model."""
     print(prompt)
-    response = model.generate_content(prompt)
-    return response.text
+    return _get_llm().invoke(prompt).content
 
-def process_voice_command(command):
-    """Process voice command through the agent with context awareness and tool access"""
-    try:
-        # Get relevant context for this command
-        context_summary = context_manager.get_context_summary()
-        relevant_context = context_manager.get_relevant_context(command)
-        
-        # Check remote tools connectivity before processing
-        remote_status = "available" if (remote_tools_manager and remote_tools_manager.health_check()) else "unavailable"
-        
-        # Build comprehensive tool descriptions
-        tool_descriptions = []
-        
-        # Add local tools
-        for tool_obj in local_tools:
-            tool_descriptions.append(f"- {tool_obj.name}: {tool_obj.description}")
-        
-        # Add remote tools if available
-        if remote_tools_manager and remote_tools:
-            available_remote = remote_tools_manager.list_available_tools()
-            for name, desc in available_remote.items():
-                tool_descriptions.append(f"- {name}: {desc}")
-        
-        tool_descriptions_text = "\n".join(tool_descriptions)
-        
-        # Create a comprehensive system prompt with context
-        system_prompt = f"""You are JARVIS, an intelligent AI assistant with persistent memory, context awareness, and access to both local and remote tools.
+# Per-command system prompt; only the remote status and the tool list vary between calls
+_SYSTEM_PROMPT_TEMPLATE = """You are JARVIS, an intelligent AI assistant with persistent memory, context awareness, and access to both local and remote tools.
 
 Core Objective:
 - Always attempt to perform any task the user requests by leveraging the available tools.
@@ -255,7 +326,7 @@ Tool Usage:
 - Chain multiple tools when needed for complex workflows.
 - Always prefer action over explanation when possible.
 
-Available Tools ({len(all_tools)} total):
+Available Tools ({tool_count} total):
 {tool_descriptions_text}
 
 Context Guidelines:
@@ -273,10 +344,41 @@ Personality:
 Golden Rule:
 Always strive to *do* what the user asks by executing tasks with available tools, maintaining context, and providing accurate, helpful, and actionable responses.
 
-Remote Tools Status: {remote_status.upper()}
+Remote Tools Status: {remote_status_upper}
 """
+
+def _build_system_prompt(remote_status: str) -> str:
+    """Build the per-command system prompt for the given remote tools status"""
+    return _format_system_prompt(remote_status, _tools_version)
+
+@functools.lru_cache(maxsize=4)
+def _format_system_prompt(remote_status: str, tools_version: int) -> str:
+    """Fill in the system prompt template; tools_version keys the cache to the current tool set"""
+    return _SYSTEM_PROMPT_TEMPLATE.format(
+        remote_status=remote_status,
+        remote_status_upper=remote_status.upper(),
+        tool_count=len(all_tools),
+        tool_descriptions_text=_get_tool_descriptions_text()
+    )
+
+def process_voice_command(command):
+    """Process voice command through the agent with context awareness and tool access"""
+    try:
+        # Check remote tools connectivity before processing
+        remote_status = "available" if _cached_health() else "unavailable"
         
-        result = agent.invoke({"messages": [("system", system_prompt), ("user", command)]})
+        system_prompt = _build_system_prompt(remote_status)
+        
+        speculation = _Speculation()
+        token = _current_speculation.set(speculation)
+        try:
+            result = _get_agent().invoke(
+                {"messages": [("system", system_prompt), ("user", command)]},
+                config={**AGENT_CONFIG, "callbacks": [speculation]}
+            )
+        finally:
+            _current_speculation.reset(token)
+            speculation.cancel()
         
         if result and result.get('messages') and len(result['messages']) > 0:
             response = result['messages'][-1].content
@@ -294,39 +396,114 @@ Remote Tools Status: {remote_status.upper()}
         context_manager.add_conversation_turn(command, error_response)
         return error_response
 
-def classify_and_summarize_response(response: str) -> dict:
-    """Classifies the agent's response and decides whether to speak the full response or a summary."""
-    # Enhanced logic considering context
-    user_stats = context_manager.get_stats()
+async def process_voice_commands_batch_async(commands):
+    """Process several commands concurrently, returning one response per command"""
+    remote_status = "available" if _cached_health() else "unavailable"
+    system_prompt = _build_system_prompt(remote_status)
     
-    # If user frequently uses brief commands, provide shorter responses
-    if len(user_stats['frequently_used_commands']) > 3 and len(response) > 300:
-        prompt = f"""The user frequently uses commands like: {', '.join(user_stats['frequently_used_commands'])}
+    agent = _get_agent()
+    slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def run(command):
+        async with slots:
+            return await agent.ainvoke(
+                {"messages": [("system", system_prompt), ("user", command)]},
+                config=AGENT_CONFIG
+            )
+    
+    results = await asyncio.gather(*(run(command) for command in commands), return_exceptions=True)
+    
+    responses = []
+    for command, result in zip(commands, results):
+        if isinstance(result, Exception):
+            response = f"Sorry, I encountered an error: {str(result)}"
+        elif result and result.get('messages'):
+            response = result['messages'][-1].content
+        else:
+            responses.append("Sorry, I couldn't process that. The agent returned an empty response.")
+            continue
+        
+        # Add this conversation turn to memory
+        context_manager.add_conversation_turn(command, response)
+        responses.append(response)
+    return responses
+
+def process_voice_commands_batch(commands):
+    """Synchronous wrapper around process_voice_commands_batch_async"""
+    return asyncio.run(process_voice_commands_batch_async(commands))
+
+def _extractive_summary(text: str, max_chars: int = 280) -> str:
+    """Shorten text for speech by keeping its leading sentences, without another LLM call"""
+    plain = _EMOJI_RE.sub('', _MARKDOWN_RE.sub('', text))
+    summary = ""
+    for line in plain.splitlines():
+        for sentence in _SENTENCE_END_RE.split(line):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            if sentence[-1] not in '.!?:':
+                sentence += '.'
+            if summary and len(summary) + len(sentence) + 1 > max_chars:
+                return summary
+            summary = f"{summary} {sentence}" if summary else sentence
+    return summary
+
+def _summary_prompt(response: str):
+    """Return the prompt for an LLM voice summary, or None when an extractive summary will do"""
+    # Only long responses for users who favour brief commands are worth a second LLM call
+    user_stats = context_manager.get_stats()
+    if len(user_stats['frequently_used_commands']) > 3 and len(response) > _LLM_SUMMARY_MIN_CHARS:
+        return f"""The user frequently uses commands like: {', '.join(user_stats['frequently_used_commands'])}
         
         Summarize this response for voice output, keeping it concise and focused on the key information:
         
         "{response}"
         
         Voice Summary:"""
-        
-        summary = generate_text(prompt)
-        return {"speak_full_response": False, "spoken_response": summary}
-    elif len(response) > 200:
-        # Standard summarization for long responses
-        prompt = f"""Summarize the following text for a voice assistant to speak. The summary should be concise and natural.
-        Text: "{response}"
-        Summary:"""
-        summary = generate_text(prompt)
-        return {"speak_full_response": False, "spoken_response": summary}
-    else:
+    return None
+
+def classify_and_summarize_response(response: str) -> dict:
+    """Classifies the agent's response and decides whether to speak the full response or a summary."""
+    if len(response) <= 200:
         return {"speak_full_response": True, "spoken_response": response}
+    
+    prompt = _summary_prompt(response)
+    summary = generate_text(prompt) if prompt else _extractive_summary(response)
+    return {"speak_full_response": False, "spoken_response": summary}
+
+def stream_spoken_response(response: str):
+    """Yield the text to speak for a response one sentence at a time, streaming the summary as it is generated"""
+    if len(response) <= 200:
+        yield response
+        return
+    
+    prompt = _summary_prompt(response)
+    if prompt is None:
+        yield _extractive_summary(response)
+        return
+    
+    pending = ""
+    for chunk in _get_llm().stream(prompt):
+        pending += chunk.content
+        *sentences, pending = _SENTENCE_END_RE.split(pending)
+        for sentence in sentences:
+            yield sentence
+    if pending.strip():
+        yield pending
+
+def close_remote_tools():
+    """Close the HTTP session shared by the remote tools managers"""
+    global _http_session
+    if _http_session is not None:
+        _http_session.close()
+        _http_session = None
 
 def get_tool_status():
     """Get status of all tools"""
     status = {
         "local_tools": len(local_tools),
         "remote_tools": len(remote_tools),
-        "remote_server_status": "connected" if (remote_tools_manager and remote_tools_manager.health_check()) else "disconnected",
+        "remote_server_status": "connected" if _cached_health() else "disconnected",
         "total_tools": len(all_tools)
     }
     return status
@@ -334,19 +511,25 @@ def get_tool_status():
 # Utility function to refresh remote tools
 def refresh_remote_tools():
     """Refresh remote tools connection and discovery"""
-    global remote_tools, all_tools
+    global remote_tools, all_tools, agent, _tools_fingerprint
     
-    print("🔄 Refreshing remote tools...")
+    logger.info("🔄 Refreshing remote tools...")
     if initialize_remote_tools():
+        fingerprint = _remote_tools_fingerprint()
+        if agent is not None and fingerprint == _tools_fingerprint:
+            # Same tools as before: the existing agent graph is still valid
+            logger.info("✅ Remote tools unchanged, keeping the current agent")
+            return True
+        
         # Update combined tools list
-        all_tools = local_tools + remote_tools + [list_available_tools]
+        all_tools = (*local_tools, *remote_tools, list_available_tools)
         
         # Recreate agent with updated tools
-        global agent
         agent = create_context_aware_agent()
+        _tools_fingerprint = fingerprint
         
-        print("✅ Remote tools refreshed successfully")
+        logger.info("✅ Remote tools refreshed successfully")
         return True
     else:
-        print("❌ Failed to refresh remote tools")
+        logger.error("❌ Failed to refresh remote tools")
         return False
\ No newline at end of file
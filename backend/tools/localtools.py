@@ -1,6 +1,10 @@
+import heapq
+import logging
 import os
+import selectors
+import signal
 import subprocess
-import json
+import sqlite3
 import threading
 import time
 import re
@@ -9,9 +13,42 @@ from typing import Dict, List, Union
 
 from langchain_core.tools import tool
 
-REMINDERS_FILE = "reminders.json"
+import jsonio
+
+logger = logging.getLogger("jarvis")
+
+REMINDERS_DB = "reminders.db"
+REMINDERS_FILE = "reminders.json"  # Legacy store, imported into the database on first use
 reminder_scheduler_running = False
 
+_db = None
+_db_lock = threading.Lock()  # The connection is shared by the scheduler thread and tool calls
+# Parsed reminders keyed by (PRAGMA data_version, local write count); either changes on any write
+_reminders_cache = {"version": None, "data": []}
+_local_writes = 0
+
+# Buffer size for file tool writes
+FILE_BUFFER_SIZE = 1 << 20
+
+# Bytes of stdout/stderr kept per command; the rest is read and discarded
+OUTPUT_LIMIT = 64 * 1024
+
+# Dangerous commands to block in the terminal tool, matched in a single regex pass
+DANGEROUS_PATTERNS = [
+    "rm -rf /", "rm -rf *", "mkfs", "dd", "shutdown", "reboot", "halt", "poweroff",
+    "kill -9 1", "chmod 777 -R /", "chown -R", ":(){ :|:& };:", "pacman -R", "pacman -Syu"
+]
+_BLOCK_RE = re.compile("|".join(re.escape(pattern) for pattern in DANGEROUS_PATTERNS))
+
+# Reminder time formats: "in X seconds/minutes/hours" and "today/tomorrow HH:MM"
+_IN_DELTA_RE = re.compile(r"in (\d+) (seconds|minutes|hours)", re.IGNORECASE)
+_DAY_TIME_RE = re.compile(r"(today|tomorrow)\s+(\d{1,2}):(\d{2})", re.IGNORECASE)
+
+# Pending reminders ordered by due time; the scheduler sleeps on the condition until the earliest one
+_reminder_heap = []  # (due_ts, id, reminder)
+_scheduled_ids = set()  # Ids currently in the heap, so a reminder is never queued twice
+_reminder_cv = threading.Condition()
+
 @tool
 def create_folder(path: str) -> str:
     """Create a folder at the given path."""
@@ -24,8 +61,7 @@ def create_file(path: str) -> str:
     folder = os.path.dirname(path)
     if folder and not os.path.exists(folder):
         os.makedirs(folder, exist_ok=True)
-    with open(path, "w") as f:
-        pass
+    os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644))
     return f"✅ File '{path}' created."
 
 @tool
@@ -33,7 +69,7 @@ def write_file(input_data: dict) -> str:
     """Write content to a file. Input should be a dict with keys: 'path', 'content'."""
     path = input_data["path"]
     content = input_data["content"]
-    with open(path, "w") as f:
+    with open(path, "w", buffering=FILE_BUFFER_SIZE, encoding="utf-8") as f:
         f.write(content)
     return f"✅ Wrote to '{path}'."
 
@@ -41,21 +77,79 @@ def write_file(input_data: dict) -> str:
 def read_file(path: str) -> str:
     """Read content from a file."""
     try:
-        with open(path, "r") as f:
-            content = f.read()
+        # Read the raw bytes in one go and decode once, skipping the text-mode layer
+        with open(path, "rb", buffering=0) as f:
+            content = f.read().decode("utf-8")
         return f"✅ Content of '{path}':\n{content}"
     except FileNotFoundError:
         return f"❌ File '{path}' not found."
     except Exception as e:
         return f"❌ Error reading '{path}': {str(e)}"
 
+def _kill_process_group(process: subprocess.Popen):
+    """Kill the shell and everything it started (the process leads its own session)."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+def _collect_output(process: subprocess.Popen, timeout: float):
+    """Read a process's stdout and stderr as they arrive, capped at OUTPUT_LIMIT bytes each.
+    
+    Kills the process if it is still producing output or running after timeout seconds.
+    Returns (stdout, stderr, timed_out).
+    """
+    buffers = {process.stdout: bytearray(), process.stderr: bytearray()}
+    truncated = set()
+    timed_out = False
+    deadline = time.monotonic() + timeout
+    
+    with selectors.DefaultSelector() as selector:
+        for stream in buffers:
+            selector.register(stream, selectors.EVENT_READ)
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # A finished shell can leave background children holding the pipes open
+                if process.poll() is None:
+                    timed_out = True
+                    _kill_process_group(process)
+                break
+            for key, _ in selector.select(remaining):
+                chunk = os.read(key.fd, 8192)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    continue
+                buffer = buffers[key.fileobj]
+                room = OUTPUT_LIMIT - len(buffer)
+                if room > 0:
+                    buffer += chunk[:room]
+                if len(chunk) > room:
+                    truncated.add(key.fileobj)
+    
+    try:
+        process.wait(timeout=max(deadline - time.monotonic(), 0))
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        _kill_process_group(process)
+        process.wait()
+    
+    stdout, stderr = (
+        buffers[stream].decode(errors="replace") + ("…[truncated]" if stream in truncated else "")
+        for stream in (process.stdout, process.stderr)
+    )
+    process.stdout.close()
+    process.stderr.close()
+    return stdout, stderr, timed_out
+
 @tool
-def execute_command(command: str) -> dict:
+def execute_command(command: str, timeout: int = 30) -> dict:
     """
     Executes a shell command and returns stdout, stderr, and exit code.
     
     Args:
         command (str): The shell command to execute.
+        timeout (int): Seconds to wait before the command is killed.
         
     Returns:
         dict: {"stdout": str, "stderr": str, "return_code": int}
@@ -64,11 +158,14 @@ def execute_command(command: str) -> dict:
         process = subprocess.Popen(
             command,
             shell=True,
+            stdin=subprocess.DEVNULL,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True
+            start_new_session=True  # So a timeout can kill the shell's children too
         )
-        stdout, stderr = process.communicate()
+        stdout, stderr, timed_out = _collect_output(process, timeout)
+        if timed_out:
+            stderr += f"\nCommand timed out after {timeout} seconds and was killed."
         return {
             "stdout": stdout.strip(),
             "stderr": stderr.strip(),
@@ -92,15 +189,8 @@ def terminal(command: str) -> str:
     Returns:
         str: Output or error message.
     """
-    # Dangerous commands to block
-    dangerous_patterns = [
-        "rm -rf /", "rm -rf *", "mkfs", "dd", "shutdown", "reboot", "halt", "poweroff",
-        "kill -9 1", "chmod 777 -R /", "chown -R", ":(){ :|:& };:", "pacman -R", "pacman -Syu"
-    ]
-    
-    for pattern in dangerous_patterns:
-        if pattern in command:
-            return f"Error: Command '{command}' is blocked for safety."
+    if _BLOCK_RE.search(command):
+        return f"Error: Command '{command}' is blocked for safety."
 
     result = execute_command(command)
     
@@ -114,75 +204,193 @@ def terminal(command: str) -> str:
 def list_directory(path: str = ".") -> str:
     """List contents of a directory."""
     try:
-        items = os.listdir(path)
-        if not items:
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        if not entries:
             return f"📁 Directory '{path}' is empty."
         
-        result = f"📁 Contents of '{path}':\n"
-        for item in sorted(items):
-            item_path = os.path.join(path, item)
-            if os.path.isdir(item_path):
-                result += f"  📁 {item}/\n"
+        parts = [f"📁 Contents of '{path}':"]
+        for entry in entries:
+            # DirEntry.is_dir() reuses the type from the directory listing instead of a fresh stat
+            if entry.is_dir(follow_symlinks=False):
+                parts.append(f"  📁 {entry.name}/")
             else:
-                result += f"  📄 {item}\n"
-        return result
+                parts.append(f"  📄 {entry.name}")
+        return "\n".join(parts)
+    except FileNotFoundError:
+        return f"❌ Directory '{path}' does not exist."
+    except NotADirectoryError:
+        return f"❌ '{path}' is not a directory."
+    except PermissionError:
+        return f"❌ Permission denied: cannot read '{path}'."
     except Exception as e:
         return f"❌ Error listing directory: {str(e)}"
 
-def load_reminders() -> List[Dict]:
-    """Load reminders from file."""
+def _get_db() -> sqlite3.Connection:
+    """Return the reminders database connection, creating the schema on first use."""
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(REMINDERS_DB, check_same_thread=False)
+        _db.row_factory = sqlite3.Row
+        _db.execute("""CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY,
+            task TEXT NOT NULL,
+            description TEXT NOT NULL DEFAULT '',
+            due_ts INTEGER NOT NULL,
+            created_ts INTEGER NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            notified INTEGER NOT NULL DEFAULT 0
+        )""")
+        _db.execute("CREATE INDEX IF NOT EXISTS idx_due ON reminders(completed, notified, due_ts)")
+        _import_legacy_reminders(_db)
+        _db.commit()
+    return _db
+
+def _import_legacy_reminders(db: sqlite3.Connection) -> None:
+    """Copy reminders from the old JSON file into an empty database."""
+    if not os.path.exists(REMINDERS_FILE) or db.execute("SELECT 1 FROM reminders LIMIT 1").fetchone():
+        return
     try:
-        if os.path.exists(REMINDERS_FILE):
-            with open(REMINDERS_FILE, "r") as f:
-                return json.load(f)
-        return []
+        with open(REMINDERS_FILE, "rb") as f:
+            raw = f.read()
+        legacy = jsonio.loads(raw)
     except Exception:
-        return []
+        return
+    db.executemany(
+        "INSERT INTO reminders (task, description, due_ts, created_ts, completed, notified) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (
+                r["task"], r.get("description", ""),
+                int(datetime.fromisoformat(r["datetime"]).timestamp()),
+                int(datetime.fromisoformat(r["created_at"]).timestamp()),
+                int(r.get("completed", False)), int(r.get("notified", False))
+            )
+            for r in legacy
+        ]
+    )
+
+def _row_to_reminder(row: sqlite3.Row) -> Dict:
+    """Convert a database row into the reminder dict shape used by the tools."""
+    return {
+        "id": row["id"],
+        "task": row["task"],
+        "description": row["description"],
+        "datetime": datetime.fromtimestamp(row["due_ts"]).strftime("%Y-%m-%d %H:%M"),
+        "created_at": datetime.fromtimestamp(row["created_ts"]).strftime("%Y-%m-%d %H:%M"),
+        "due_ts": row["due_ts"],
+        "completed": bool(row["completed"]),
+        "notified": bool(row["notified"])
+    }
 
-def save_reminders(reminders: List[Dict]) -> None:
-    """Save reminders to file."""
+def load_reminders() -> List[Dict]:
+    """Load all reminders from the database, reusing the last result while nothing has changed."""
     try:
-        with open(REMINDERS_FILE, "w") as f:
-            json.dump(reminders, f, indent=2)
+        with _db_lock:
+            db = _get_db()
+            # data_version only moves for commits from other connections, so count our own writes too
+            version = (db.execute("PRAGMA data_version").fetchone()[0], _local_writes)
+            if version != _reminders_cache["version"]:
+                rows = db.execute("SELECT * FROM reminders ORDER BY id").fetchall()
+                _reminders_cache.update(version=version, data=[_row_to_reminder(row) for row in rows])
+            return _reminders_cache["data"]
     except Exception:
-        pass
+        return []
+
+def add_reminder(task: str, description: str, due: datetime, created: datetime) -> Dict:
+    """Store a new reminder and return it."""
+    global _local_writes
+    with _db_lock:
+        db = _get_db()
+        cursor = db.execute(
+            "INSERT INTO reminders (task, description, due_ts, created_ts) VALUES (?, ?, ?, ?)",
+            (task, description, int(due.timestamp()), int(created.timestamp()))
+        )
+        db.commit()
+        _local_writes += 1
+        row = db.execute("SELECT * FROM reminders WHERE id = ?", (cursor.lastrowid,)).fetchone()
+    return _row_to_reminder(row)
+
+def get_pending_reminders(since_ts: int) -> List[Dict]:
+    """Return reminders not yet notified that fall due at or after since_ts (Unix seconds)."""
+    with _db_lock:
+        rows = _get_db().execute(
+            "SELECT * FROM reminders WHERE completed = 0 AND notified = 0 AND due_ts >= ?",
+            (since_ts,)
+        ).fetchall()
+    return [_row_to_reminder(row) for row in rows]
+
+def mark_reminders_notified(ids: List[int]) -> None:
+    """Flag the given reminders as notified."""
+    global _local_writes
+    with _db_lock:
+        db = _get_db()
+        db.execute(f"UPDATE reminders SET notified = 1 WHERE id IN ({','.join('?' * len(ids))})", ids)
+        db.commit()
+        _local_writes += 1
 
 def show_reminder_notification(reminder: Dict):
     """Show and speak reminder notification"""
     message = f"Reminder alert! {reminder['task']}"
     # In a modular approach, the main loop would handle calling the speak function.
-    print("\n" + "="*60)
-    print("🔔🔔🔔 REMINDER ALERT! 🔔🔔🔔")
-    print("="*60)
-    print(f"⏰ TIME: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"📝 TASK: {reminder['task']}")
+    lines = [
+        "",
+        "=" * 60,
+        "🔔🔔🔔 REMINDER ALERT! 🔔🔔🔔",
+        "=" * 60,
+        f"⏰ TIME: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"📝 TASK: {reminder['task']}",
+    ]
     if reminder['description']:
-        print(f"📄 DESCRIPTION: {reminder['description']}")
-    print("="*60 + "\n")
+        lines.append(f"📄 DESCRIPTION: {reminder['description']}")
+    lines.append("=" * 60)
+    # One log record for the whole banner instead of a print per line
+    logger.warning("\n".join(lines))
+
+def schedule_reminder(reminder: Dict) -> None:
+    """Queue a reminder for notification and wake the scheduler."""
+    with _reminder_cv:
+        if reminder["id"] in _scheduled_ids:
+            return
+        _scheduled_ids.add(reminder["id"])
+        heapq.heappush(_reminder_heap, (reminder["due_ts"], reminder["id"], reminder))
+        _reminder_cv.notify()
+
+def _next_due_reminder():
+    """Block until the earliest reminder falls due and return it, or None once the scheduler stops."""
+    with _reminder_cv:
+        while reminder_scheduler_running:
+            if not _reminder_heap:
+                _reminder_cv.wait()
+                continue
+            due_ts, _, reminder = _reminder_heap[0]
+            delay = due_ts - time.time()
+            if delay > 0:
+                # Far-future reminders exceed what a lock wait accepts; wake early and loop instead
+                _reminder_cv.wait(timeout=min(delay, threading.TIMEOUT_MAX))
+                continue
+            heapq.heappop(_reminder_heap)
+            _scheduled_ids.discard(reminder["id"])
+            return reminder
+        return None
 
 def reminder_scheduler():
     """Background scheduler for reminders"""
-    global reminder_scheduler_running
+    # Reminders that fell due up to a minute ago still get announced
+    try:
+        for reminder in get_pending_reminders(int(time.time()) - 60):
+            schedule_reminder(reminder)
+    except Exception as e:
+        logger.error("❌ Reminder scheduler error: %s", e)
     
-    while reminder_scheduler_running:
+    while True:
+        reminder = _next_due_reminder()
+        if reminder is None:
+            return
         try:
-            reminders = load_reminders()
-            now = datetime.now()
-            
-            for reminder in reminders:
-                if not reminder["completed"] and not reminder.get("notified", False):
-                    remind_time = datetime.strptime(reminder["datetime"], "%Y-%m-%d %H:%M")
-                    
-                    if 0 <= (now - remind_time).total_seconds() <= 60:
-                        show_reminder_notification(reminder)
-                        reminder["notified"] = True
-                        save_reminders(reminders)
-            
-            time.sleep(30)
-            
+            show_reminder_notification(reminder)
+            mark_reminders_notified([reminder["id"]])
         except Exception as e:
-            print(f"❌ Reminder scheduler error: {e}")
-            time.sleep(60)
+            logger.error("❌ Reminder scheduler error: %s", e)
 
 @tool
 def create_reminder(input_data: dict) -> str:
@@ -195,8 +403,8 @@ def create_reminder(input_data: dict) -> str:
         now = datetime.now()
         remind_time = None
 
-        # Regex for "in X seconds/minutes/hours"
-        match = re.match(r"in (\d+) (seconds|minutes|hours)", datetime_str, re.IGNORECASE)
+        match = _IN_DELTA_RE.match(datetime_str)
+        day_match = _DAY_TIME_RE.fullmatch(datetime_str.strip())
 
         if match:
             value = int(match.group(1))
@@ -209,33 +417,20 @@ def create_reminder(input_data: dict) -> str:
             elif unit == "hours":
                 remind_time = now + timedelta(hours=value)
 
-        elif datetime_str.lower().startswith("today"):
-            time_part = datetime_str.split(" ", 1)[1]
-            hour, minute = map(int, time_part.split(":"))
-            remind_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            if remind_time <= now:
-                remind_time += timedelta(days=1)
-        elif datetime_str.lower().startswith("tomorrow"):
-            time_part = datetime_str.split(" ", 1)[1]
-            hour, minute = map(int, time_part.split(":"))
-            remind_time = (now + timedelta(days=1)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+        elif day_match:
+            day = day_match.group(1).lower()
+            hour, minute = int(day_match.group(2)), int(day_match.group(3))
+            if day == "today":
+                remind_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                if remind_time <= now:
+                    remind_time += timedelta(days=1)
+            else:
+                remind_time = (now + timedelta(days=1)).replace(hour=hour, minute=minute, second=0, microsecond=0)
         else:
-            remind_time = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M")
+            remind_time = datetime.fromisoformat(datetime_str)
         
         if remind_time:
-            reminders = load_reminders()
-            new_reminder = {
-                "id": len(reminders) + 1,
-                "task": task,
-                "description": description,
-                "datetime": remind_time.strftime("%Y-%m-%d %H:%M"),
-                "created_at": now.strftime("%Y-%m-%d %H:%M"),
-                "completed": False,
-                "notified": False
-            }
-            
-            reminders.append(new_reminder)
-            save_reminders(reminders)
+            schedule_reminder(add_reminder(task, description, remind_time, now))
             
             return f"✅ Reminder created: '{task}' on {remind_time.strftime('%Y-%m-%d at %H:%M')}"
         else:
@@ -248,17 +443,19 @@ def create_reminder(input_data: dict) -> str:
 def list_reminders() -> str:
     """List all active reminders."""
     try:
-        reminders = load_reminders()
-        active_reminders = [r for r in reminders if not r["completed"]]
+        active_reminders = sorted(
+            (r for r in load_reminders() if not r["completed"]),
+            key=lambda r: r["due_ts"]
+        )
         
         if not active_reminders:
             return "📅 No active reminders found."
         
-        result = "📅 Active Reminders:\n"
+        parts = ["📅 Active Reminders:"]
         for reminder in active_reminders:
-            result += f"  {reminder['id']}. {reminder['task']} - {reminder['datetime']}\n"
+            parts.append(f"  {reminder['id']}. {reminder['task']} - {reminder['datetime']}")
         
-        return result
+        return "\n".join(parts)
     except Exception as e:
         return f"❌ Error listing reminders: {str(e)}"
 
@@ -274,4 +471,11 @@ def start_reminder_scheduler():
     if not reminder_scheduler_running:
         reminder_scheduler_running = True
         scheduler_thread = threading.Thread(target=reminder_scheduler, daemon=True)
-        scheduler_thread.start()
\ No newline at end of file
+        scheduler_thread.start()
+
+def stop_reminder_scheduler():
+    """Stop reminder scheduler"""
+    global reminder_scheduler_running
+    with _reminder_cv:
+        reminder_scheduler_running = False
+        _reminder_cv.notify()
\ No newline at end of file
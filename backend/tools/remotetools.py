@@ -1,8 +1,110 @@
 import requests
 import json
-from typing import Dict, Any, List, Callable
-from langchain_core.tools import tool
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+from typing import Dict, Any, List, Callable, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from langchain_core.tools import tool
+
+# Kept local rather than importing backend/jsonio.py so this module still runs on its own (see __main__)
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+
+def _dumps(data, indent=False) -> bytes:
+    """
+    Serialize data to JSON bytes, using orjson when available
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, indent=2 if indent else None).encode('utf-8')
+
+
+def _loads(raw):
+    """
+    Parse JSON from bytes, using orjson when available
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def create_session(pool_connections: int = 10, pool_maxsize: int = 20) -> requests.Session:
+    """
+    Create a pooled HTTP session so calls to the tools server reuse keep-alive connections
+    """
+    session = requests.Session()
+    # Retries cover connection failures and gateway errors on idempotent methods; POSTs are never replayed
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504], raise_on_status=False),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive", "Content-Type": "application/json"})
+    return session
+
+
+# Successful GET responses are reused for this many seconds
+GET_CACHE_TTL = 30.0
+GET_CACHE_SIZE = 512
+
+
+def _format_value(value) -> str:
+    """
+    Pretty-print lists and dicts as indented JSON, everything else as-is
+    """
+    if isinstance(value, (list, dict)):
+        return _dumps(value, indent=True).decode()
+    return str(value)
+
+
+def _format_success_field(tool_name: str, result: Dict[str, Any]) -> str:
+    """
+    Format a response carrying an explicit "success" flag
+    """
+    if not result["success"]:
+        return f"❌ {tool_name} failed: {result.get('error', 'Unknown error')}"
+    parts = [f"✅ {tool_name} completed successfully"]
+    message = result.get("message", "")
+    data = result.get("data", "")
+    if message:
+        parts.append(f"💬 {message}")
+    if data:
+        parts.append(f"📊 Data: {_format_value(data)}")
+    return "\n".join(parts)
+
+
+def _format_error_field(tool_name: str, result: Dict[str, Any]) -> str:
+    """
+    Format a response that only reports an error
+    """
+    return f"❌ {tool_name} error: {result['error']}"
+
+
+def _format_fields(tool_name: str, result: Dict[str, Any]) -> str:
+    """
+    Format any other dict response as one line per field
+    """
+    parts = [f"✅ {tool_name} response:"]
+    parts.extend(f"📋 {key}: {_format_value(value)}" for key, value in result.items())
+    return "\n".join(parts).strip()
+
+
+# Dict response formatters keyed by ("success" in result, "error" in result)
+_DICT_FORMATTERS = {
+    (True, True): _format_success_field,
+    (True, False): _format_success_field,
+    (False, True): _format_error_field,
+    (False, False): _format_fields,
+}
 
 
 class RemoteToolsManager:
@@ -10,10 +112,16 @@ class RemoteToolsManager:
     Manager for dynamically discovering and registering remote tools as LangChain tools
     """
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", session: Optional[requests.Session] = None):
         self.base_url = base_url
+        self._owns_session = session is None  # A session passed in is shared, so leave closing it to the caller
+        self.session = session or create_session()
         self.tools = []
         self.tool_configs = {}
+        self._requests = {}  # Tool name -> (send, is_get) bound at registration
+        self._pool = None  # Worker threads for execute_many, created on first use
+        self._get_cache = OrderedDict()  # (tool name, kwargs JSON) -> (expiry, formatted response)
+        self._get_cache_lock = threading.Lock()
         
     def discover_tools(self) -> bool:
         """
@@ -21,10 +129,10 @@ class RemoteToolsManager:
         """
         try:
             print(f"🔍 Discovering tools from {self.base_url}...")
-            response = requests.get(f"{self.base_url}/gmail/tools/list", timeout=10)
+            response = self.session.get(f"{self.base_url}/gmail/tools/list", timeout=10)
             
             if response.status_code == 200:
-                tools_data = response.json()
+                tools_data = _loads(response.content)
                 self._register_tools(tools_data.get('tools', []))
                 print(f"✅ Successfully registered {len(self.tools)} remote tools")
                 return True
@@ -67,9 +175,13 @@ class RemoteToolsManager:
         tool_name = tool_config['name']
         tool_description = tool_config['description']
         
+        # Resolve the URL and HTTP call once, so each invocation goes straight to the request
+        send, is_get = self._requests[tool_name] = self._bind_request(tool_config)
+        run = self._run_remote_tool
+        
         # Create the actual function that will be called
         def remote_tool_function(**kwargs):
-            return self._execute_remote_tool(tool_name, **kwargs)
+            return run(tool_name, send, is_get, kwargs)
         
         # Set function name and docstring
         remote_tool_function.__name__ = tool_name
@@ -82,42 +194,60 @@ class RemoteToolsManager:
         
         return langchain_tool
     
+    def _bind_request(self, tool_config: Dict):
+        """
+        Return (send, is_get) for a tool, where send(payload) issues its HTTP request (None if the method is unsupported)
+        """
+        url = f"{self.base_url}{tool_config['endpoint']}"
+        method = tool_config['method'].upper()
+        if method == 'POST':
+            post = self.session.post
+            # Content-Type is set on the session
+            return (lambda payload: post(url, data=_dumps(payload), timeout=30)), False
+        if method == 'GET':
+            get = self.session.get
+            return (lambda payload: get(url, params=payload, timeout=30)), True
+        return None, False
+    
     def _execute_remote_tool(self, tool_name: str, **kwargs) -> str:
         """
-        Execute a remote tool and return formatted response
+        Execute a remote tool by name and return formatted response
         """
         try:
-            tool_config = self.tool_configs[tool_name]
-            endpoint = tool_config['endpoint']
-            method = tool_config['method']
+            send, is_get = self._requests[tool_name]
+        except KeyError:
+            return f"❌ Error executing {tool_name}: unknown tool"
+        return self._run_remote_tool(tool_name, send, is_get, kwargs)
+    
+    def _run_remote_tool(self, tool_name: str, send, is_get: bool, payload: Dict[str, Any]) -> str:
+        """
+        Send a tool request through its bound HTTP call and return formatted response
+        """
+        try:
+            if send is None:
+                return f"❌ Unsupported HTTP method: {self.tool_configs[tool_name]['method']}"
             
-            payload = kwargs
+            cache_key = None
+            if is_get:
+                cache_key = (tool_name, json.dumps(payload, sort_keys=True, default=str))
+                cached = self._get_cached(cache_key)
+                if cached is not None:
+                    return cached
             
             print(f"🔧 Executing remote tool: {tool_name}")
             print(f"📤 Payload: {payload}")
             
             # Make the request
-            if method.upper() == 'POST':
-                response = requests.post(
-                    f"{self.base_url}{endpoint}",
-                    json=payload,
-                    timeout=30,
-                    headers={'Content-Type': 'application/json'}
-                )
-            elif method.upper() == 'GET':
-                response = requests.get(
-                    f"{self.base_url}{endpoint}",
-                    params=payload,
-                    timeout=30
-                )
-            else:
-                return f"❌ Unsupported HTTP method: {method}"
+            response = send(payload)
             
             # Handle response
             if response.status_code == 200:
                 try:
-                    result = response.json()
-                    return self._format_tool_response(tool_name, result)
+                    result = _loads(response.content)
+                    formatted = self._format_tool_response(tool_name, result)
+                    if cache_key is not None and self._is_cacheable(result):
+                        self._store_cached(cache_key, formatted)
+                    return formatted
                 except json.JSONDecodeError:
                     return f"✅ {tool_name} completed successfully:\n{response.text}"
             else:
@@ -130,43 +260,60 @@ class RemoteToolsManager:
         except Exception as e:
             return f"❌ Error executing {tool_name}: {str(e)}"
     
+    @staticmethod
+    def _is_cacheable(result: Any) -> bool:
+        """
+        Only successful results are worth reusing; failures should be retried
+        """
+        if isinstance(result, dict):
+            return result.get("success") is not False and "error" not in result
+        return True
+    
+    def _get_cached(self, key):
+        """
+        Return an unexpired cached GET response, or None
+        """
+        with self._get_cache_lock:
+            entry = self._get_cache.get(key)
+            if entry is None:
+                return None
+            expires, formatted = entry
+            if expires < time.monotonic():
+                del self._get_cache[key]
+                return None
+            self._get_cache.move_to_end(key)
+            return formatted
+    
+    def _store_cached(self, key, formatted: str):
+        """
+        Cache a GET response, evicting the least recently used entry when full
+        """
+        with self._get_cache_lock:
+            self._get_cache[key] = (time.monotonic() + GET_CACHE_TTL, formatted)
+            self._get_cache.move_to_end(key)
+            if len(self._get_cache) > GET_CACHE_SIZE:
+                self._get_cache.popitem(last=False)
+    
+    def execute_many(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """
+        Execute several remote tools concurrently and return their responses in call order
+        """
+        if len(calls) <= 1:
+            return [self._execute_remote_tool(name, **kwargs) for name, kwargs in calls]
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="remote-tool")
+        futures = [self._pool.submit(self._execute_remote_tool, name, **kwargs) for name, kwargs in calls]
+        return [future.result() for future in futures]
+    
     def _format_tool_response(self, tool_name: str, result: Dict[str, Any]) -> str:
         """
         Format the tool response for better readability
         """
         if isinstance(result, dict):
-            if "success" in result:
-                if result["success"]:
-                    message = result.get("message", "")
-                    data = result.get("data", "")
-                    
-                    response = f"✅ {tool_name} completed successfully"
-                    if message:
-                        response += f"\n💬 {message}"
-                    if data:
-                        if isinstance(data, (list, dict)):
-                            response += f"\n📊 Data: {json.dumps(data, indent=2)}"
-                        else:
-                            response += f"\n📊 Data: {data}"
-                    return response
-                else:
-                    error = result.get("error", "Unknown error")
-                    return f"❌ {tool_name} failed: {error}"
-            
-            # If no success field, format as general response
-            elif "error" in result:
-                return f"❌ {tool_name} error: {result['error']}"
-            else:
-                # Format general response
-                response = f"✅ {tool_name} response:\n"
-                for key, value in result.items():
-                    if isinstance(value, (list, dict)):
-                        response += f"📋 {key}: {json.dumps(value, indent=2)}\n"
-                    else:
-                        response += f"📋 {key}: {value}\n"
-                return response.strip()
-        else:
-            return f"✅ {tool_name} result: {result}"
+            # A "success" field takes precedence over an "error" field
+            formatter = _DICT_FORMATTERS[("success" in result, "error" in result)]
+            return formatter(tool_name, result)
+        return f"✅ {tool_name} result: {result}"
     
     def get_tools(self) -> List:
         """
@@ -189,12 +336,22 @@ class RemoteToolsManager:
         """
         return self.tool_configs.get(tool_name, {})
     
+    def close(self):
+        """
+        Release the worker threads and the pooled connections held by this manager's session
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self._owns_session:
+            self.session.close()
+    
     def health_check(self) -> bool:
         """
         Check if the remote tools server is accessible
         """
         try:
-            response = requests.get(f"{self.base_url}/health", timeout=5)
+            response = self.session.get(f"{self.base_url}/health", timeout=5)
             return response.status_code == 200
         except:
             return False
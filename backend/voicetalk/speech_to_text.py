@@ -1,52 +1,178 @@
+import functools
+import os
+import re
 import sounddevice as sd
 import numpy as np
 import queue
+import ctranslate2
 import faster_whisper
+import threading
 import time
 from difflib import SequenceMatcher
 
-# Load Faster Whisper model
+# Load Faster Whisper model, quantized to int8 (with fp16 activations on a GPU)
 model_size = "small"
-model = faster_whisper.WhisperModel(model_size, device="cpu")
+use_cuda = ctranslate2.get_cuda_device_count() > 0
+model = faster_whisper.WhisperModel(
+    model_size,
+    device="cuda" if use_cuda else "cpu",
+    compute_type="int8_float16" if use_cuda else "int8",
+    cpu_threads=max(1, (os.cpu_count() or 2) // 2),
+    num_workers=1
+)
+
+# Optionally pay the first-inference cost now rather than on the first "hey jarvis"
+# (VAD is off, otherwise the silent clip would be filtered out before reaching the model)
+if os.getenv("JARVIS_WARMUP") == "1":
+    list(model.transcribe(np.zeros(16000, dtype=np.float32), beam_size=1, language="en", vad_filter=False)[0])
+
+# Commands are decoded with beam search for accuracy
+transcribe_command = functools.partial(
+    model.transcribe,
+    beam_size=5,
+    language="en",
+    task="transcribe",
+    vad_filter=True
+)
+
+# Wakeword windows only need a rough greedy pass, without timestamps or cross-window context
+transcribe_wakeword = functools.partial(
+    model.transcribe,
+    beam_size=1,
+    best_of=1,
+    temperature=0.0,
+    language="en",
+    task="transcribe",
+    vad_filter=True,
+    without_timestamps=True,
+    word_timestamps=False,
+    condition_on_previous_text=False,
+    no_speech_threshold=0.6
+)
 
 samplerate = 16000
 block_size = 1024
-audio_queue = queue.Queue()
+
+# The audio callback writes straight into this ring; readers keep their own position in it.
+# ring_write counts every sample ever written, so ring_write % len(ring) is the next slot.
+ring_seconds = 10
+ring = np.zeros(samplerate * ring_seconds, dtype=np.float32)
+ring_write = 0
+ring_cv = threading.Condition()
+
+# End-of-utterance detection for record_and_transcribe
+silence_threshold = 0.01  # RMS level below which a block counts as silence
+silence_duration = 1.0  # Seconds of silence after speech that end the utterance
+
+# Wakeword windows with less than this many seconds above silence_threshold skip Whisper entirely
+wakeword_min_voiced = 0.25
+
+WAKEWORDS = (
+    "hey jarvis", "jarvis", "hey j", "jarvis wake up",
+    "hello jarvis", "hi jarvis", "yo jarvis",
+    "hey javis", "hey jarvin", "jarvas"
+)
+
+# One input stream shared by wakeword detection and recording, opened on first use
+input_stream = None
+
+# Wakeword windows are transcribed on a background thread so capture never waits on Whisper.
+# Each listen_for_wakeword call gets a new generation, so results for older audio are ignored.
+wakeword_windows = queue.Queue(maxsize=2)  # (generation, audio); the oldest is dropped when full
+wakeword_results = queue.Queue()  # (generation, matched wakeword)
+wakeword_generation = 0
+wakeword_worker = None
+wakeword_stop = threading.Event()
 
 def audio_callback(indata, frames, time, status):
     """Callback for audio input stream"""
+    global ring_write
     if status:
         print(f"Audio status: {status}")
-    audio_queue.put(indata.copy())
+    pos = ring_write % len(ring)
+    first = min(frames, len(ring) - pos)
+    ring[pos:pos + first] = indata[:first, 0]
+    ring[:frames - first] = indata[first:frames, 0]
+    with ring_cv:
+        ring_write += frames
+        ring_cv.notify_all()
+
+def audio_position():
+    """Return the current write position, i.e. a reader cursor that skips everything captured so far"""
+    with ring_cv:
+        return ring_write
+
+def read_audio(cursor, max_samples=block_size, timeout=0.1):
+    """Return (samples, new cursor) for up to max_samples after cursor, or (None, cursor) on timeout"""
+    with ring_cv:
+        if ring_write <= cursor and not ring_cv.wait_for(lambda: ring_write > cursor, timeout):
+            return None, cursor
+        end = ring_write
+    # A reader that fell a full ring behind has lost that audio; resume from the oldest kept sample
+    cursor = max(cursor, end - len(ring))
+    end = min(end, cursor + max_samples)
+    start, stop = cursor % len(ring), end % len(ring)
+    if start < stop or stop == 0:
+        samples = ring[start:start + (end - cursor)].copy()
+    else:
+        samples = np.concatenate((ring[start:], ring[:stop]))
+    return samples, end
+
+def get_input_stream():
+    """Return the shared input stream, opening it on first use"""
+    global input_stream
+    if input_stream is None:
+        input_stream = sd.InputStream(samplerate=samplerate, channels=1, callback=audio_callback, blocksize=block_size)
+        input_stream.start()
+    return input_stream
+
+def close_input_stream():
+    """Stop and close the shared input stream"""
+    global input_stream
+    if input_stream is not None:
+        input_stream.stop()
+        input_stream.close()
+        input_stream = None
+    wakeword_stop.set()
 
 def record_and_transcribe(duration=5):
-    """Record audio for specified duration and return transcription"""
+    """Record until the speaker pauses (or for at most duration seconds) and return transcription"""
     print("🎤 Listening...")
-    buffer = []
+    # Preallocated for the longest allowed recording; blocks are copied in by slice
+    buffer = np.empty(int(samplerate * duration), dtype=np.float32)
+    filled = 0
     
     try:
-        with sd.InputStream(samplerate=samplerate, channels=1, callback=audio_callback, blocksize=block_size):
-            start_time = time.time()
-            while time.time() - start_time < duration:
-                try:
-                    data = audio_queue.get(timeout=0.1)
-                    buffer.extend(data[:, 0])
-                except queue.Empty:
-                    continue
+        get_input_stream()
+        # Start from now, skipping audio captured while nobody was listening (e.g. while JARVIS was speaking)
+        cursor = audio_position()
+        heard_speech = False
+        silent_samples = 0
+        start_time = time.time()
+        while time.time() - start_time < duration and filled < len(buffer):
+            data, cursor = read_audio(cursor)
+            if data is None:
+                continue
+            n = min(len(data), len(buffer) - filled)
+            buffer[filled:filled + n] = data[:n]
+            filled += n
+            
+            # Stop once speech has been followed by enough silence
+            if np.sqrt(np.mean(data ** 2)) < silence_threshold:
+                silent_samples += len(data)
+                if heard_speech and silent_samples >= samplerate * silence_duration:
+                    break
+            else:
+                heard_speech = True
+                silent_samples = 0
         
-        if not buffer:
+        if not filled:
             return ""
         
-        audio_chunk = np.array(buffer, dtype=np.float32)
+        audio_chunk = buffer[:filled]
         
         # Transcribe
-        segments, _ = model.transcribe(
-            audio_chunk,
-            beam_size=5,
-            language="en",
-            task="transcribe",
-            vad_filter=True
-        )
+        segments, _ = transcribe_command(audio_chunk)
         
         transcription = " ".join(segment.text.strip() for segment in segments)
         return transcription.strip()
@@ -55,83 +181,157 @@ def record_and_transcribe(duration=5):
         print(f"❌ Transcription error: {e}")
         return ""
 
-def similarity(a, b):
-    """Calculate similarity between two strings"""
-    return SequenceMatcher(None, a, b).ratio()
+@functools.lru_cache(maxsize=8)
+def _prepare_wakewords(wakewords):
+    """Lowercase and split the wakewords once, and build one regex for the substring check"""
+    entries = [(wakeword, wakeword.lower(), len(wakeword.split())) for wakeword in wakewords]
+    by_lower = {lower: wakeword for wakeword, lower, _ in entries}
+    # Longest alternatives first so "hey jarvis" wins over "jarvis"
+    pattern = re.compile("|".join(map(re.escape, sorted(by_lower, key=len, reverse=True))))
+    return entries, by_lower, pattern
 
-def detect_wakeword(transcription, wakewords, similarity_threshold=0.7):
+def detect_wakeword(transcription, wakewords=WAKEWORDS, similarity_threshold=0.7):
     """Detect wakeword with fuzzy matching"""
     transcription = transcription.lower().strip()
+    entries, by_lower, pattern = _prepare_wakewords(tuple(wakewords))
     
     # Direct substring matching
-    for wakeword in wakewords:
-        if wakeword.lower() in transcription:
-            return True, wakeword
+    match = pattern.search(transcription)
+    if match:
+        return True, by_lower[match.group(0)]
     
     # Word-by-word similarity matching
     transcription_words = transcription.split()
-    for wakeword in wakewords:
-        wakeword_words = wakeword.lower().split()
-        
-        for i in range(len(transcription_words) - len(wakeword_words) + 1):
-            sequence = ' '.join(transcription_words[i:i+len(wakeword_words)])
-            if similarity(sequence, wakeword.lower()) >= similarity_threshold:
+    matcher = SequenceMatcher(None)
+    for wakeword, lower, word_count in entries:
+        # set_seq2 caches the wakeword's lookup tables across every window compared with it
+        matcher.set_seq2(lower)
+        for i in range(len(transcription_words) - word_count + 1):
+            matcher.set_seq1(' '.join(transcription_words[i:i + word_count]))
+            if matcher.ratio() >= similarity_threshold:
                 return True, wakeword
     
     return False, None
 
+def _wakeword_worker():
+    """Transcribe queued wakeword windows and report the ones that contain a wakeword"""
+    while not wakeword_stop.is_set():
+        try:
+            generation, audio_chunk = wakeword_windows.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if generation != wakeword_generation:
+            continue  # Queued for a listen call that has already returned
+        
+        try:
+            segments, _ = transcribe_wakeword(audio_chunk)
+            
+            transcription = " ".join(segment.text.strip() for segment in segments)
+            
+            if transcription.strip():
+                print(f"🎤 Heard: '{transcription}'")
+                
+                detected, matched_wakeword = detect_wakeword(transcription)
+                
+                if detected:
+                    wakeword_results.put((generation, matched_wakeword))
+        except Exception as e:
+            print(f"⚠️ Wakeword detection error: {e}")
+
+def _start_wakeword_worker():
+    """Start the transcription thread if it is not already running"""
+    global wakeword_worker
+    wakeword_stop.clear()
+    if wakeword_worker is None or not wakeword_worker.is_alive():
+        wakeword_worker = threading.Thread(target=_wakeword_worker, name="wakeword-stt", daemon=True)
+        wakeword_worker.start()
+
+def _queue_wakeword_window(generation, audio_chunk):
+    """Hand a window to the worker, dropping the oldest queued one if it has fallen behind"""
+    while True:
+        try:
+            wakeword_windows.put_nowait((generation, audio_chunk))
+            return
+        except queue.Full:
+            try:
+                wakeword_windows.get_nowait()
+            except queue.Empty:
+                pass
+
+def _drain_wakeword_windows():
+    """Drop windows still waiting for the worker"""
+    while True:
+        try:
+            wakeword_windows.get_nowait()
+        except queue.Empty:
+            return
+
+def _pop_wakeword_match(generation):
+    """Return a wakeword matched for this generation, discarding results for older audio"""
+    while True:
+        try:
+            result_generation, matched_wakeword = wakeword_results.get_nowait()
+        except queue.Empty:
+            return None
+        if result_generation == generation:
+            return matched_wakeword
+
 def listen_for_wakeword():
     """Listen continuously for wakeword"""
-    wakewords = [
-        "hey jarvis", "jarvis", "hey j", "jarvis wake up",
-        "hello jarvis", "hi jarvis", "yo jarvis",
-        "hey javis", "hey jarvin", "jarvas"
-    ]
-    
+    global wakeword_generation
     print(f"🟢 Listening for wakewords...")
-    buffer = []
     chunk_duration = 3
+    window_samples = samplerate * chunk_duration
+    overlap_samples = int(samplerate * 0.5)
+    # One window plus a block of headroom, reused for every chunk
+    buffer = np.empty(window_samples + block_size, dtype=np.float32)
+    filled = 0
+    voiced_samples = 0
     
-    with sd.InputStream(samplerate=samplerate, channels=1, callback=audio_callback, blocksize=block_size):
-        while True:
-            try:
-                data = audio_queue.get(timeout=0.1)
-                buffer.extend(data[:, 0])
+    wakeword_generation += 1
+    generation = wakeword_generation
+    get_input_stream()
+    cursor = audio_position()
+    _start_wakeword_worker()
+    while True:
+        try:
+            matched_wakeword = _pop_wakeword_match(generation)
+            if matched_wakeword:
+                print(f"🟢 Wakeword detected: '{matched_wakeword}'")
+                # Retire this generation so leftover windows are not transcribed during the command
+                wakeword_generation += 1
+                _drain_wakeword_windows()
+                return True
+            
+            data, cursor = read_audio(cursor)
+            if data is None:
+                continue
+            n = min(len(data), len(buffer) - filled)
+            buffer[filled:filled + n] = data[:n]
+            filled += n
+            if np.sqrt(np.mean(data ** 2)) >= silence_threshold:
+                voiced_samples += len(data)
+            
+            if filled >= window_samples:
+                audio_chunk = buffer[:filled].copy()
                 
-                if len(buffer) >= samplerate * chunk_duration:
-                    audio_chunk = np.array(buffer, dtype=np.float32)
-                    
-                    # Keep overlap for continuous detection
-                    overlap_samples = int(samplerate * 0.5)
-                    buffer = buffer[-overlap_samples:] if len(buffer) > overlap_samples else []
-                    
-                    # Transcribe
-                    segments, _ = model.transcribe(
-                        audio_chunk,
-                        beam_size=5,
-                        language="en",
-                        task="transcribe",
-                        vad_filter=True
-                    )
-                    
-                    transcription = " ".join(segment.text.strip() for segment in segments)
-                    
-                    if transcription.strip():
-                        print(f"🎤 Heard: '{transcription}'")
-                        
-                        detected, matched_wakeword = detect_wakeword(transcription, wakewords)
+                # Keep overlap for continuous detection
+                buffer[:overlap_samples] = buffer[filled - overlap_samples:filled]
+                filled = overlap_samples
+                
+                # Energy gate: a window that is mostly silence cannot contain the wakeword
+                voiced_seconds = voiced_samples / samplerate
+                voiced_samples = 0
+                if voiced_seconds < wakeword_min_voiced:
+                    continue
+                
+                _queue_wakeword_window(generation, audio_chunk)
                         
-                        if detected:
-                            print(f"🟢 Wakeword detected: '{matched_wakeword}'")
-                            return True
-                            
-            except queue.Empty:
-                continue
-            except KeyboardInterrupt:
-                print("\n🔴 Stopping wakeword detection...")
-                return False
-            except Exception as e:
-                print(f"⚠️ Wakeword detection error: {e}")
-                time.sleep(1)
-                continue
+        except KeyboardInterrupt:
+            print("\n🔴 Stopping wakeword detection...")
+            return False
+        except Exception as e:
+            print(f"⚠️ Wakeword detection error: {e}")
+            time.sleep(1)
+            continue
 
@@ -1,3 +1,5 @@
+import contextlib
+import os
 import torch
 from kokoro import KPipeline
 import soundfile as sf
@@ -5,22 +7,37 @@ import numpy as np
 import sounddevice as sd
 
 device = "cuda" if torch.cuda.is_available() else "cpu"
+if device == "cpu":
+    # Leave half the cores for Whisper and the UI
+    torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
 pipeline = KPipeline(lang_code='a', device=device)
 
+def _inference_context():
+    """No autograd bookkeeping, and fp16 autocast on the GPU"""
+    stack = contextlib.ExitStack()
+    stack.enter_context(torch.inference_mode())
+    if device == "cuda":
+        stack.enter_context(torch.autocast("cuda", dtype=torch.float16))
+    return stack
+
+# Optionally run one tiny synthesis now so the first real reply does not pay the startup cost
+if os.getenv("JARVIS_WARMUP") == "1":
+    with _inference_context():
+        for _ in pipeline("hi", voice="af_heart", speed=1):
+            pass
+
 def speak(text, voice="af_heart", speed=1):
     """Convert text to speech and play it"""
     try:
         print(f"🔊 Speaking: {text}")
         generator = pipeline(text, voice=voice, speed=speed, split_pattern=r'\n+')
-        audio_data = []
-        
-        for *_, audio in generator:
-            audio_data.append(audio)
         
-        if audio_data:
-            final_audio = np.concatenate(audio_data)
-            sd.play(final_audio, 24000)
-            sd.wait()  # Wait until playback finishes
+        # Play each chunk as soon as it is synthesized; leaving the block drains the stream
+        # (the generator runs the model lazily, so inference happens inside this block)
+        with _inference_context(), sd.OutputStream(samplerate=24000, channels=1, dtype='float32') as stream:
+            for *_, audio in generator:
+                if audio is not None:
+                    stream.write(np.ascontiguousarray(audio.float().cpu(), dtype=np.float32))
     except Exception as e:
         print(f"❌ TTS Error: {e}")
         print(f"📢 {text}")  # Fallback to text output
\ No newline at end of file
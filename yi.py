@@ -1,12 +1,32 @@
 import sys
 import math
-import random
+import numpy as np
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QTextEdit, QPushButton, QHBoxLayout
-from PyQt5.QtCore import QTimer, Qt, QPoint, QRect, QSize, pyqtSignal
-from PyQt5.QtGui import QPainter, QPen, QColor, QFont
+from PyQt5.QtCore import QTimer, Qt, QRect, QSize, pyqtSignal, QRunnable, QThreadPool
+from PyQt5.QtGui import QPainter, QPen, QColor, QFont, QPolygon
+
+# Animation tick (ms) while the widget is hidden and the wave has settled
+IDLE_FRAME_INTERVAL = 200
+
+class _JarvisTask(QRunnable):
+    """Runs jarvis_callback off the UI thread and hands the response back through a signal"""
+
+    def __init__(self, callback, message, response_signal):
+        super().__init__()
+        self._callback = callback
+        self._message = message
+        self._response_signal = response_signal
+
+    def run(self):
+        try:
+            response = self._callback(self._message)
+        except Exception as e:
+            response = f"Sorry, I encountered an error: {e}"
+        self._response_signal.emit(str(response))
 
 class SiriVoiceWidget(QWidget):
     state_changed = pyqtSignal(str)
+    response_ready = pyqtSignal(str)
 
     def __init__(self, jarvis_callback=None):
         super().__init__()
@@ -18,15 +38,43 @@ class SiriVoiceWidget(QWidget):
         self.jarvis_callback = jarvis_callback
         self.expanded = False
         self.chat_history = []
+        self._rendered = 0  # Messages of chat_history already shown in chat_display
+
+        # Wave x offsets, envelopes and point buffers are fixed, so build them once
+        self._listen_xs = np.arange(-30, 30, 2)
+        self._listen_env = np.exp(-np.abs(self._listen_xs) * 0.015)
+        self._listen_poly = QPolygon(len(self._listen_xs))
+        self._speak_xs = np.arange(-35, 35, 2)
+        self._speak_env = np.exp(-np.abs(self._speak_xs) * 0.01)
+        self._speak_poly = QPolygon(len(self._speak_xs))
+        self._rng = np.random.default_rng()
+
+        # Colors and pens per state, built once instead of on every paint
+        self._state_colors = {
+            'listening': QColor(80, 255, 120, 200),   # Green
+            'processing': QColor(255, 80, 80, 200),   # Red
+            'speaking': QColor(80, 150, 255, 200),    # Blue
+        }
+        self._state_pens = {
+            'listening': QPen(self._state_colors['listening'], 2.5, Qt.SolidLine, Qt.RoundCap),
+            'processing': QPen(self._state_colors['processing'], 3),
+            'speaking': QPen(self._state_colors['speaking'], 2.5, Qt.SolidLine, Qt.RoundCap),
+        }
+
         self.initUI()
         self.setup_timer()
         self.update_target_amplitude()
 
         self.state_changed.connect(self._update_state)
+        self.response_ready.connect(self._show_response)
 
     def _update_state(self, state):
         self.set_state(state)
 
+    def _show_response(self, response):
+        self.add_message("JARVIS", response)
+        self.set_state('listening')
+
     def initUI(self):
         # Small compact size similar to Siri
         self.setFixedSize(160, 100)
@@ -49,11 +97,22 @@ class SiriVoiceWidget(QWidget):
     def setup_timer(self):
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_animation)
-        self.timer.start(30)  # ~33 FPS
+        self.timer.start(self._frame_interval())
+
+    def _frame_interval(self):
+        # ~33 FPS, or the display's frame period if that is slower
+        refresh_rate = QApplication.primaryScreen().refreshRate()
+        return max(30, int(1000 / refresh_rate)) if refresh_rate > 0 else 30
+
+    def _wake_timer(self):
+        interval = self._frame_interval()
+        if self.timer.interval() != interval:
+            self.timer.setInterval(interval)
 
     def set_state(self, state):
         self.current_state = state
         self.update_target_amplitude()
+        self._wake_timer()
 
     def update_target_amplitude(self):
         if self.current_state == 'listening':
@@ -67,15 +126,18 @@ class SiriVoiceWidget(QWidget):
         self.time_offset += 0.15
         amp_diff = self.target_amplitude - self.wave_amplitude
         self.wave_amplitude += amp_diff * 0.1
+        if not self.isVisible():
+            if abs(amp_diff) < 0.05:
+                # Nothing on screen and nothing settling: tick slowly until shown or the state changes
+                self.timer.setInterval(IDLE_FRAME_INTERVAL)
+            return
+        # show() may be called from another thread, so the normal rate is restored here on the GUI thread
+        if self.timer.interval() == IDLE_FRAME_INTERVAL:
+            self._wake_timer()
         self.update()
 
     def get_state_color(self):
-        if self.current_state == 'listening':
-            return QColor(80, 255, 120, 200)    # Green
-        elif self.current_state == 'processing':
-            return QColor(255, 80, 80, 200)    # Red
-        elif self.current_state == 'speaking':
-            return QColor(80, 150, 255, 200)   # Blue
+        return self._state_colors.get(self.current_state)
 
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -88,34 +150,29 @@ class SiriVoiceWidget(QWidget):
         self.draw_siri_waveform(painter, center_x, center_y)
 
     def draw_siri_waveform(self, painter, center_x, center_y):
-        state_color = self.get_state_color()
+        state_pen = self._state_pens.get(self.current_state)
         if self.current_state == 'listening':
-            self.draw_listening_wave(painter, center_x, center_y, state_color)
+            self.draw_listening_wave(painter, center_x, center_y, state_pen)
         elif self.current_state == 'processing':
-            self.draw_thinking_pattern(painter, center_x, center_y, state_color)
+            self.draw_thinking_pattern(painter, center_x, center_y, state_pen)
         elif self.current_state == 'speaking':
-            self.draw_speaking_wave(painter, center_x, center_y, state_color)
+            self.draw_speaking_wave(painter, center_x, center_y, state_pen)
             
-    def draw_listening_wave(self, painter, center_x, center_y, color):
-        pen = QPen(color, 2.5)
-        pen.setCapStyle(Qt.RoundCap)
+    def draw_listening_wave(self, painter, center_x, center_y, pen):
         painter.setPen(pen)
         
-        wave_width = 60
-        points = []
-        
-        for x in range(-wave_width//2, wave_width//2, 2):
-            y = self.wave_amplitude * math.sin(x * 0.1 + self.time_offset) * \
-                math.exp(-abs(x) * 0.015)
-            noise = 2 * math.sin(self.time_offset * 2 + x * 0.2)
-            y += noise
-            points.append(QPoint(center_x + x, int(center_y + y)))
-            
-        for i in range(len(points) - 1):
-            painter.drawLine(points[i], points[i + 1])
+        xs = self._listen_xs
+        ys = self.wave_amplitude * np.sin(xs * 0.1 + self.time_offset) * self._listen_env
+        ys += 2 * np.sin(self.time_offset * 2 + xs * 0.2)
+        painter.drawPolyline(self._fill_polygon(self._listen_poly, center_x + xs, center_y + ys))
+
+    def _fill_polygon(self, polygon, xs, ys):
+        """Write the wave points into a reused polygon (y truncated like int())"""
+        for i, (x, y) in enumerate(zip(xs.tolist(), ys.astype(int).tolist())):
+            polygon.setPoint(i, x, y)
+        return polygon
             
-    def draw_thinking_pattern(self, painter, center_x, center_y, color):
-        pen = QPen(color, 3)
+    def draw_thinking_pattern(self, painter, center_x, center_y, pen):
         painter.setPen(pen)
         for i in range(3):
             pulse = abs(math.sin(self.time_offset + i * 0.8)) * self.wave_amplitude * 0.3
@@ -132,25 +189,21 @@ class SiriVoiceWidget(QWidget):
     def close(self):
         super().close()
             
-    def draw_speaking_wave(self, painter, center_x, center_y, color):
-        pen = QPen(color, 2.5)
-        pen.setCapStyle(Qt.RoundCap)
+    def draw_speaking_wave(self, painter, center_x, center_y, pen):
         painter.setPen(pen)
         
-        wave_width = 70
-        points = []
-        
-        for x in range(-wave_width//2, wave_width//2, 2):
-            y1 = self.wave_amplitude * 0.6 * math.sin(x * 0.08 + self.time_offset)
-            y2 = self.wave_amplitude * 0.3 * math.sin(x * 0.15 + self.time_offset * 1.5)
-            y3 = self.wave_amplitude * 0.2 * math.sin(x * 0.3 + self.time_offset * 2)
-            y = (y1 + y2 + y3) * math.exp(-abs(x) * 0.01)
-            if random.random() > 0.7:
-                y += random.uniform(-3, 3)
-            points.append(QPoint(center_x + x, int(center_y + y)))
-            
-        for i in range(len(points) - 1):
-            painter.drawLine(points[i], points[i + 1])
+        xs = self._speak_xs
+        t = self.time_offset
+        ys = (
+            0.6 * np.sin(xs * 0.08 + t)
+            + 0.3 * np.sin(xs * 0.15 + t * 1.5)
+            + 0.2 * np.sin(xs * 0.3 + t * 2)
+        ) * (self.wave_amplitude * self._speak_env)
+        # Jitter roughly 30% of the points by up to ±3px
+        jitter = self._rng.uniform(-3, 3, len(xs))
+        jitter[self._rng.random(len(xs)) <= 0.7] = 0.0
+        ys += jitter
+        painter.drawPolyline(self._fill_polygon(self._speak_poly, center_x + xs, center_y + ys))
             
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -244,7 +297,8 @@ class SiriVoiceWidget(QWidget):
         layout.addLayout(input_layout)
         self.setLayout(layout)
         
-        # Load chat history
+        # Load chat history into the new display
+        self._rendered = 0
         self.update_chat_display()
         
     def send_message(self):
@@ -253,25 +307,29 @@ class SiriVoiceWidget(QWidget):
             self.add_message("You", message)
             self.input_field.clear()
             
-            # Process the message through JARVIS
+            # Process the message through JARVIS on a worker thread so the animation keeps running
             if self.jarvis_callback:
-                self.set_state('think')
-                response = self.jarvis_callback(message)
-                self.add_message("JARVIS", response)
-                self.set_state('listen')
+                self.set_state('processing')
+                QThreadPool.globalInstance().start(
+                    _JarvisTask(self.jarvis_callback, message, self.response_ready)
+                )
                 
     def add_message(self, sender, message):
         self.chat_history.append({"sender": sender, "message": message})
-        self.update_chat_display()
+        # Replies arrive asynchronously; if the chat was collapsed meanwhile its display is gone,
+        # and create_chat_interface renders the full history when it is reopened
+        if self.expanded:
+            self.update_chat_display()
         
     def update_chat_display(self):
-        self.chat_display.clear()
-        for msg in self.chat_history:
+        # Only append messages added since the last call; earlier ones are already shown
+        for msg in self.chat_history[self._rendered:]:
             if msg["sender"] == "You":
                 self.chat_display.append(f"<b>You:</b> {msg['message']}")
             else:
                 self.chat_display.append(f"<b style='color:#4CAF50'>JARVIS:</b> {msg['message']}")
             self.chat_display.append("")  # Empty line for spacing
+        self._rendered = len(self.chat_history)
         
         # Scroll to bottom
         self.chat_display.verticalScrollBar().setValue(